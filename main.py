@@ -30,6 +30,7 @@ def main():
     p_import = sub.add_parser("import-template", help="Import a filled template CSV/XLSX into the DB")
     p_import.add_argument("path", help="Path to filled template file")
     p_import.add_argument("--db", default=os.getenv("DB_PATH", "./data/app.db"), help="DB path (overrides env)")
+    p_import.add_argument("--check-duplicates", action="store_true", help="Flag likely duplicates of the imported rows")
 
     p_add = sub.add_parser("add", help="Interactively add a single case row")
     p_add.add_argument("--db", default=os.getenv("DB_PATH", "./data/app.db"), help="DB path (overrides env)")
@@ -37,6 +38,13 @@ def main():
     p_report_cases.add_argument("--db", default=os.getenv("DB_PATH", "./data/app.db"), help="DB path (overrides env)")
     p_report_cases.add_argument("--out-csv", default="cases_summary.csv", help="Output summary CSV path")
     p_report_cases.add_argument("--out-prefix", default="cases_report", help="Output prefix for per-chart files")
+    p_dupes = sub.add_parser("find-duplicates", help="Find likely duplicate cases in the DB")
+    p_dupes.add_argument("--db", default=os.getenv("DB_PATH", "./data/app.db"), help="DB path (overrides env)")
+    p_dupes.add_argument("--threshold", type=float, default=0.85, help="Minimum name similarity (0-1) to report")
+    p_dupes.add_argument("--window", type=int, default=None, help="Date window in days (default: the index's window, initially 7)")
+    p_dupes.add_argument("--max-block-size", type=int, default=20, help="Skip blocks with more cases than this (e.g. a shared complainant)")
+    p_dupes.add_argument("--rebuild", action="store_true", help="Rebuild the blocking index from scratch")
+    p_dupes.add_argument("--out", default=None, help="Optional CSV path to write the duplicate pairs")
     p_run_scheduler = sub.add_parser("run-scheduler", help="Run the file-drop scheduler to auto-import templates")
     p_run_scheduler.add_argument("--db", default=os.getenv("DB_PATH", "./data/app.db"), help="DB path (overrides env)")
     p_run_scheduler.add_argument("--drop", default="./data/drop", help="Drop folder to watch")
@@ -93,12 +101,20 @@ def main():
         print(f"Created template file: {out_path}")
 
     elif args.cmd == "import-template":
-        from src.collectors import import_template_into_db
+        from src.collectors import import_template_into_db, import_template_with_duplicate_check
         db_path = args.db
         os.makedirs(os.path.dirname(db_path), exist_ok=True)
         try:
-            count = import_template_into_db(args.path, db_path)
-            print(f"Imported {count} rows into database {db_path}")
+            if not args.check_duplicates:
+                count = import_template_into_db(args.path, db_path)
+                print(f"Imported {count} rows into database {db_path}")
+            else:
+                count, dupes = import_template_with_duplicate_check(args.path, db_path)
+                print(f"Imported {count} rows into database {db_path}")
+                if len(dupes):
+                    print(f"Flagged {len(dupes)} likely duplicate(s):")
+                    for row in dupes.itertuples(index=False):
+                        print(f" - case {row.case_id} looks like case {row.duplicate_of} (score {row.score})")
         except Exception as e:
             print(f"Import failed: {e}")
 
@@ -167,6 +183,22 @@ def main():
         except Exception as e:
             print(f"Failed to generate reports: {e}")
 
+    elif args.cmd == "find-duplicates":
+        from src.dedup import find_duplicates, update_blocking_index
+        db_path = args.db
+        try:
+            if args.rebuild:
+                update_blocking_index(db_path, window_days=args.window, rebuild=True)
+            dupes = find_duplicates(db_path, threshold=args.threshold, window_days=args.window, max_block_size=args.max_block_size)
+            print(f"Found {len(dupes)} likely duplicate pair(s)")
+            for row in dupes.itertuples(index=False):
+                print(f" - case {row.case_id} looks like case {row.duplicate_of} (score {row.score})")
+            if args.out:
+                dupes.to_csv(args.out, index=False)
+                print(f"Wrote duplicate pairs to {args.out}")
+        except Exception as e:
+            print(f"Failed to find duplicates: {e}")
+
     elif args.cmd == "run-scheduler":
         from scripts.scheduler import run_scheduler
         db_path = args.db
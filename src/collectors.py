@@ -114,3 +114,21 @@ def import_template_into_db(path, db_path):
     init_cases_table(db_path)
     insert_cases_from_df(cleandf, db_path)
     return len(cleandf)
+
+
+def import_template_with_duplicate_check(path, db_path):
+    """Import a template like `import_template_into_db` and flag likely duplicates.
+
+    Returns `(count, duplicates)`, where `duplicates` is a dataframe of likely
+    duplicates involving the new rows (see `src.dedup.find_duplicates`).
+    """
+    from sqlalchemy import create_engine, text
+    from .storage import init_cases_table
+    from .dedup import find_duplicates
+
+    init_cases_table(db_path)
+    engine = create_engine(f"sqlite:///{db_path}")
+    with engine.connect() as conn:
+        last_id = conn.execute(text("SELECT COALESCE(MAX(rowid), 0) FROM cases")).scalar()
+    count = import_template_into_db(path, db_path)
+    return count, find_duplicates(db_path, since_id=last_id)
@@ -0,0 +1,448 @@
+"""Near-duplicate detection for the `cases` table.
+
+Rows are grouped into blocks by court, a date window and phonetic codes of the
+`complainant`/`accused` name tokens. Block memberships are persisted in the
+`case_blocks` table, which triggers on `cases` keep up to date incrementally,
+so finding candidates for new rows only touches the blocks those rows fall
+into. Candidate pairs are then scored on name similarity, field by field.
+"""
+import re
+import unicodedata
+from collections import Counter
+from datetime import date
+
+DEFAULT_WINDOW_DAYS = 7
+DEFAULT_THRESHOLD = 0.85
+DEFAULT_MAX_BLOCK_SIZE = 20
+_SCORE_BATCH_SIZE = 10000
+_CASE_CACHE_SIZE = 100000
+
+_NAME_FIELDS = (("c", "complainant"), ("a", "accused"))
+_SOUNDEX_CODES = {
+    **dict.fromkeys("bfpv", "1"),
+    **dict.fromkeys("cgjkqsxz", "2"),
+    **dict.fromkeys("dt", "3"),
+    "l": "4",
+    **dict.fromkeys("mn", "5"),
+    "r": "6",
+}
+
+
+def normalize_name(value):
+    """Lowercase, strip accents and punctuation, and sort name tokens."""
+    if value is None or (isinstance(value, float) and value != value):
+        return ""
+    s = unicodedata.normalize("NFKD", str(value))
+    s = "".join(ch for ch in s if not unicodedata.combining(ch)).lower()
+    tokens = re.sub(r"[^a-z0-9]+", " ", s).split()
+    return " ".join(sorted(tokens))
+
+
+def soundex(token):
+    """Return the American Soundex code of a single name token."""
+    token = "".join(ch for ch in token.lower() if ch.isalpha())
+    if not token:
+        return ""
+    out = token[0].upper()
+    prev = _SOUNDEX_CODES.get(token[0], "")
+    for ch in token[1:]:
+        code = _SOUNDEX_CODES.get(ch, "")
+        if code and code != prev:
+            out += code
+        if ch not in "hw":
+            prev = code
+    return (out + "000")[:4]
+
+
+def _parse_date(value):
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(str(value)[:10])
+    except ValueError:
+        return None
+
+
+def _date_bucket(value, window_days):
+    d = _parse_date(value)
+    return None if d is None else d.toordinal() // window_days
+
+
+def blocking_keys(row):
+    """Return the blocking keys for a case row (a mapping of column values).
+
+    One key is produced per court / name role / phonetic token, so a spelling
+    change in one name still leaves the row sharing blocks via the others.
+    """
+    court = normalize_name(row.get("court_heard_in"))
+    keys = set()
+    for role, field in _NAME_FIELDS:
+        for token in normalize_name(row.get(field)).split():
+            if len(token) < 2:
+                continue
+            code = soundex(token)
+            if code:
+                keys.add(f"{court}|{role}:{code}")
+    return sorted(keys)
+
+
+def _names(row):
+    return tuple(normalize_name(row.get(field)) for _, field in _NAME_FIELDS)
+
+
+def _jaro_winkler(s1, s2):
+    """Jaro-Winkler similarity of two strings, in [0, 1]."""
+    if s1 == s2:
+        return 1.0
+    l1, l2 = len(s1), len(s2)
+    if not l1 or not l2:
+        return 0.0
+    window = max(max(l1, l2) // 2 - 1, 0)
+    used1, used2 = [False] * l1, [False] * l2
+    matches = 0
+    for i, ch in enumerate(s1):
+        for j in range(max(0, i - window), min(l2, i + window + 1)):
+            if not used2[j] and s2[j] == ch:
+                used1[i] = used2[j] = True
+                matches += 1
+                break
+    if not matches:
+        return 0.0
+    k = transpositions = 0
+    for i in range(l1):
+        if used1[i]:
+            while not used2[k]:
+                k += 1
+            if s1[i] != s2[k]:
+                transpositions += 1
+            k += 1
+    jaro = (matches / l1 + matches / l2 + (matches - transpositions / 2) / matches) / 3
+    prefix = 0
+    for a, b in zip(s1[:4], s2[:4]):
+        if a != b:
+            break
+        prefix += 1
+    return jaro + prefix * 0.1 * (1 - jaro)
+
+
+def _name_similarity(na, nb, threshold=0.0):
+    """Similarity of two normalized names, compared token by token.
+
+    Each token of the shorter name is matched to its closest token in the
+    other and the worst of those matches is the score, so "Jon Smyth" still
+    matches "John Smith" but "Jane Smith" does not. Each extra token in the
+    longer name (e.g. "The State" vs "State") costs 5%.
+    """
+    ta, tb = na.split(), nb.split()
+    if not ta or not tb:
+        return 0.0
+    if len(ta) > len(tb):
+        ta, tb = tb, ta
+    score = 0.95 ** (len(tb) - len(ta))
+    for token in ta:
+        score = min(score, max(_jaro_winkler(token, other) for other in tb))
+        if score < threshold:
+            return 0.0
+    return score
+
+
+def _score_names(a, b, threshold=0.0):
+    """Lowest similarity over normalized name tuples, or 0.0 once one falls below `threshold`."""
+    scores = []
+    for na, nb in zip(a, b):
+        if na == nb:
+            if na:
+                scores.append(1.0)
+            continue
+        score = _name_similarity(na, nb, threshold)
+        if score < threshold:
+            return 0.0
+        scores.append(score)
+    return min(scores) if scores else 0.0
+
+
+def score_pair(a, b):
+    """Similarity in [0, 1] of two case rows: the lowest score of the name fields.
+
+    Taking the minimum means every name has to match on its own, so a
+    boilerplate complainant such as "The State" cannot carry a pair whose
+    accused differ.
+    """
+    return _score_names(_names(a), _names(b))
+
+
+def _init_index(conn):
+    """Create the index tables and the triggers that keep them in step with `cases`.
+
+    Inserted or edited cases are queued in `case_blocks_pending`; deleted or
+    edited cases have their blocks dropped straight away. `case_block_sizes`
+    counts the members of each block so oversized ones can be skipped.
+    """
+    from sqlalchemy import text
+
+    conn.execute(text(
+        """
+        CREATE TABLE IF NOT EXISTS case_blocks (
+            block_key TEXT NOT NULL,
+            date_bucket INTEGER NOT NULL,
+            case_id INTEGER NOT NULL
+        )
+        """
+    ))
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_case_blocks_key ON case_blocks (block_key, date_bucket)"
+    ))
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_case_blocks_case ON case_blocks (case_id)"
+    ))
+    conn.execute(text(
+        """
+        CREATE TABLE IF NOT EXISTS case_block_sizes (
+            block_key TEXT NOT NULL,
+            date_bucket INTEGER NOT NULL,
+            size INTEGER NOT NULL,
+            PRIMARY KEY (block_key, date_bucket)
+        )
+        """
+    ))
+    conn.execute(text(
+        "CREATE TABLE IF NOT EXISTS case_blocks_pending (case_id INTEGER PRIMARY KEY)"
+    ))
+    conn.execute(text(
+        "CREATE TABLE IF NOT EXISTS case_blocks_meta (window_days INTEGER)"
+    ))
+    conn.execute(text(
+        """
+        CREATE TRIGGER IF NOT EXISTS case_blocks_insert AFTER INSERT ON cases
+        BEGIN
+            INSERT OR IGNORE INTO case_blocks_pending (case_id) VALUES (NEW.rowid);
+        END
+        """
+    ))
+    conn.execute(text(
+        """
+        CREATE TRIGGER IF NOT EXISTS case_blocks_delete AFTER DELETE ON cases
+        BEGIN
+            UPDATE case_block_sizes SET size = size - 1
+            WHERE (block_key, date_bucket) IN (
+                SELECT block_key, date_bucket FROM case_blocks WHERE case_id = OLD.rowid
+            );
+            DELETE FROM case_blocks WHERE case_id = OLD.rowid;
+            DELETE FROM case_blocks_pending WHERE case_id = OLD.rowid;
+        END
+        """
+    ))
+    conn.execute(text(
+        """
+        CREATE TRIGGER IF NOT EXISTS case_blocks_update AFTER UPDATE ON cases
+        BEGIN
+            UPDATE case_block_sizes SET size = size - 1
+            WHERE (block_key, date_bucket) IN (
+                SELECT block_key, date_bucket FROM case_blocks WHERE case_id = OLD.rowid
+            );
+            DELETE FROM case_blocks WHERE case_id = OLD.rowid;
+            DELETE FROM case_blocks_pending WHERE case_id = OLD.rowid;
+            INSERT OR IGNORE INTO case_blocks_pending (case_id) VALUES (NEW.rowid);
+        END
+        """
+    ))
+
+
+def _has_table(conn, name):
+    from sqlalchemy import text
+
+    return conn.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+        {"name": name},
+    ).first() is not None
+
+
+def update_blocking_index(db_path, window_days=None, rebuild=False):
+    """Index any queued cases and return how many were processed.
+
+    Triggers on `cases` queue new and edited rows, so each call only reads
+    those. The first call on an existing table queues every row.
+    `window_days` defaults to the window the index was built with; passing a
+    different one (or `rebuild=True`) re-indexes the whole table.
+    """
+    from sqlalchemy import create_engine, text
+
+    if window_days is not None and window_days < 1:
+        raise ValueError(f"window_days must be at least 1, got {window_days}")
+
+    engine = create_engine(f"sqlite:///{db_path}")
+    with engine.begin() as conn:
+        if not _has_table(conn, "cases"):
+            return 0
+        _init_index(conn)
+        stored = conn.execute(text("SELECT window_days FROM case_blocks_meta")).scalar()
+        if window_days is None:
+            window_days = stored if stored is not None else DEFAULT_WINDOW_DAYS
+        if stored is None or rebuild or stored != window_days:
+            conn.execute(text("DELETE FROM case_blocks"))
+            conn.execute(text("DELETE FROM case_block_sizes"))
+            conn.execute(text("DELETE FROM case_blocks_meta"))
+            conn.execute(
+                text("INSERT INTO case_blocks_meta (window_days) VALUES (:w)"),
+                {"w": window_days},
+            )
+            conn.execute(text(
+                "INSERT OR IGNORE INTO case_blocks_pending (case_id) SELECT rowid FROM cases"
+            ))
+
+        rows = conn.execute(text(
+            "SELECT c.rowid AS id, c.date, c.complainant, c.accused, c.court_heard_in "
+            "FROM case_blocks_pending p JOIN cases c ON c.rowid = p.case_id"
+        )).mappings().all()
+        if not rows:
+            return 0
+
+        entries = []
+        sizes = Counter()
+        for row in rows:
+            bucket = _date_bucket(row["date"], window_days)
+            if bucket is None:
+                continue
+            for key in blocking_keys(row):
+                entries.append({"k": key, "b": bucket, "id": row["id"]})
+                sizes[key, bucket] += 1
+        if entries:
+            conn.execute(
+                text("INSERT INTO case_blocks (block_key, date_bucket, case_id) VALUES (:k, :b, :id)"),
+                entries,
+            )
+            conn.execute(
+                text(
+                    "INSERT INTO case_block_sizes (block_key, date_bucket, size) VALUES (:k, :b, :n) "
+                    "ON CONFLICT (block_key, date_bucket) DO UPDATE SET size = size + excluded.size"
+                ),
+                [{"k": k, "b": b, "n": n} for (k, b), n in sizes.items()],
+            )
+        conn.execute(text("DELETE FROM case_blocks_pending"))
+    return len(rows)
+
+
+def _candidate_pairs(conn, max_block_size, since_id=None):
+    """Yield `(newer, older)` case id pairs that share a block, each once.
+
+    Blocks with more than `max_block_size` members in a date window (for
+    example every case with complainant "The State" in a busy court) are
+    skipped, which bounds the work per case. The `CROSS JOIN`s pin SQLite's
+    join order so that the size check runs before the block is scanned.
+    Rows are streamed in order of the newer case, so pairs found through
+    several shared blocks only need de-duplicating per case.
+    """
+    from sqlalchemy import text
+
+    query = (
+        "SELECT a.case_id AS x, b.case_id AS y FROM case_blocks a "
+        "CROSS JOIN case_block_sizes sa ON sa.block_key = a.block_key "
+        "AND sa.date_bucket = a.date_bucket AND sa.size <= :max_size "
+        "CROSS JOIN case_block_sizes sb ON sb.block_key = a.block_key "
+        "AND sb.date_bucket BETWEEN a.date_bucket - 1 AND a.date_bucket + 1 AND sb.size <= :max_size "
+        "CROSS JOIN case_blocks b ON b.block_key = sb.block_key AND b.date_bucket = sb.date_bucket "
+        "WHERE a.case_id > b.case_id "
+    )
+    params = {"max_size": max_block_size}
+    if since_id is not None:
+        # The newer case of any pair involving a new case is itself new
+        query += "AND a.case_id > :since "
+        params["since"] = since_id
+    query += "ORDER BY a.case_id"
+
+    current, seen = None, set()
+    for x, y in conn.execute(text(query), params):
+        if x != current:
+            current, seen = x, set()
+        if y not in seen:
+            seen.add(y)
+            yield x, y
+
+
+def _load_cases(conn, ids):
+    """Return `{id: (date, names)}` for the given case ids."""
+    from sqlalchemy import text
+
+    ids = sorted(ids)
+    cases = {}
+    # Stay under SQLite's bound-parameter limit
+    for start in range(0, len(ids), 500):
+        chunk = ids[start:start + 500]
+        placeholders = ", ".join(f":i{n}" for n in range(len(chunk)))
+        result = conn.execute(
+            text(
+                "SELECT rowid AS id, date, complainant, accused, court_heard_in "
+                f"FROM cases WHERE rowid IN ({placeholders})"
+            ),
+            {f"i{n}": v for n, v in enumerate(chunk)},
+        )
+        for row in result.mappings():
+            cases[row["id"]] = (_parse_date(row["date"]), _names(row))
+    return cases
+
+
+def _score_batch(conn, pairs, threshold, window_days, cache):
+    """Score a batch of candidate pairs, loading case rows missing from `cache`."""
+    missing = {i for pair in pairs for i in pair if i not in cache}
+    if len(cache) + len(missing) > _CASE_CACHE_SIZE:
+        cache.clear()
+        missing = {i for pair in pairs for i in pair}
+    cache.update(_load_cases(conn, missing))
+    found = []
+    for newer, older in pairs:
+        if newer not in cache or older not in cache:
+            continue
+        (da, names_a), (db, names_b) = cache[newer], cache[older]
+        if da is None or db is None or abs((da - db).days) > window_days:
+            continue
+        score = _score_names(names_a, names_b, threshold)
+        if score >= threshold:
+            found.append((newer, older, round(score, 3)))
+    return found
+
+
+def find_duplicates(db_path, threshold=DEFAULT_THRESHOLD, window_days=None, since_id=None,
+                    max_block_size=DEFAULT_MAX_BLOCK_SIZE):
+    """Find likely duplicate pairs in the `cases` table.
+
+    Only rows sharing a block (same court, a matching name code and dates in
+    adjacent windows) are compared, and only if their dates are at most
+    `window_days` apart (defaults to the index's window). If `since_id` is
+    given, only pairs involving a case with a greater id are returned. Blocks
+    larger than `max_block_size` are too common to tell cases apart and are
+    ignored. Candidate pairs are streamed and scored in batches, and at most
+    `_CASE_CACHE_SIZE` case rows are held at once, so memory use does not
+    grow with the size of the table.
+
+    Returns a dataframe with columns `case_id`, `duplicate_of` and `score`,
+    where `duplicate_of` is the older of the two cases.
+    """
+    import pandas as pd
+    from sqlalchemy import create_engine, text
+
+    if not 0 <= threshold <= 1:
+        raise ValueError(f"threshold must be between 0 and 1, got {threshold}")
+    if max_block_size < 1:
+        raise ValueError(f"max_block_size must be at least 1, got {max_block_size}")
+
+    columns = ["case_id", "duplicate_of", "score"]
+    update_blocking_index(db_path, window_days=window_days)
+
+    engine = create_engine(f"sqlite:///{db_path}")
+    found = []
+    # Case rows are looked up on a second connection while the first streams pairs
+    with engine.connect() as conn, engine.connect() as lookup:
+        if not _has_table(conn, "cases"):
+            return pd.DataFrame(columns=columns)
+        window_days = conn.execute(text("SELECT window_days FROM case_blocks_meta")).scalar()
+        batch, cache = [], {}
+        for pair in _candidate_pairs(conn, max_block_size, since_id):
+            batch.append(pair)
+            if len(batch) >= _SCORE_BATCH_SIZE:
+                found.extend(_score_batch(lookup, batch, threshold, window_days, cache))
+                batch = []
+        if batch:
+            found.extend(_score_batch(lookup, batch, threshold, window_days, cache))
+
+    df = pd.DataFrame(sorted(found), columns=columns)
+    return df.sort_values("score", ascending=False, kind="stable").reset_index(drop=True)
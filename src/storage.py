@@ -41,9 +41,14 @@ def insert_cases_from_df(df, db_path):
 
     - Normalizes date columns to ISO `YYYY-MM-DD` strings (where possible)
     - Converts `submitted` to 0/1
+    - Adds the new rows to the duplicate-detection blocking index. The rows are
+      already committed by then, so an indexing failure is only logged; the
+      rows stay queued and are indexed on the next call.
     """
+    import logging
     import pandas as pd
     from sqlalchemy import create_engine
+    from .dedup import update_blocking_index
 
     df2 = df.copy()
     # Ensure columns exist
@@ -76,3 +81,7 @@ def insert_cases_from_df(df, db_path):
 
     engine = create_engine(f"sqlite:///{db_path}")
     df2.to_sql("cases", engine, if_exists="append", index=False)
+    try:
+        update_blocking_index(db_path)
+    except Exception as e:
+        logging.getLogger(__name__).warning(f"Could not update duplicate index for {db_path}: {e}")
@@ -0,0 +1,189 @@
+import random
+
+import pandas as pd
+import pytest
+
+from src.collectors import import_template_into_db, import_template_with_duplicate_check
+from src.dedup import _candidate_pairs, blocking_keys, find_duplicates, normalize_name, score_pair, soundex
+from src.storage import init_cases_table, insert_cases_from_df, read_table_from_sqlite
+
+
+def make_case(complainant, accused, date="2025-11-24", court="Magistrates Court"):
+    return {
+        "date": date,
+        "complainant": complainant,
+        "accused": accused,
+        "offences": "Theft",
+        "subject": "Case A",
+        "court_heard_in": court,
+        "submitted": "yes",
+    }
+
+
+def test_normalize_and_soundex():
+    assert normalize_name("  Smith,  JOSÉ ") == "jose smith"
+    assert soundex("Smith") == soundex("Smyth") == "S530"
+    assert soundex("Ashcraft") == "A261"
+
+
+def test_score_pair_tolerates_rekeying_typos():
+    assert score_pair(make_case("John Smith", "Robert Brown"), make_case("Jon Smyth", "Robert Browne")) >= 0.85
+    assert score_pair(make_case("John Smith", "Bob Lee"), make_case("Jon Smyth", "Bob Lee")) >= 0.85
+    assert score_pair(make_case("The State", "Bob Lee"), make_case("State", "Bob Lee")) >= 0.85
+
+
+def test_blocking_keys_include_court_and_role():
+    keys = blocking_keys(make_case("Jon Smith", "Bob Brown"))
+    assert "court magistrates|c:S530" in keys
+    assert "court magistrates|a:B650" in keys
+
+
+def test_find_duplicates_within_blocks(tmp_path):
+    db = str(tmp_path / "test.db")
+    init_cases_table(db)
+    insert_cases_from_df(pd.DataFrame([
+        make_case("John Smith", "Robert Brown"),
+        make_case("Alice Jones", "Bob Brown"),
+        make_case("John Smith", "Robert Brown", court="High Court"),
+        make_case("John Smith", "Robert Brown", date="2025-10-01"),
+    ]), db)
+    insert_cases_from_df(pd.DataFrame([make_case("Jon Smyth", "Robert Browne", date="2025-11-26")]), db)
+
+    dupes = find_duplicates(db)
+    assert list(zip(dupes["case_id"], dupes["duplicate_of"])) == [(5, 1)]
+    assert dupes.loc[0, "score"] >= 0.85
+    # Index was updated incrementally on each insert
+    blocks = read_table_from_sqlite("case_blocks", db)
+    assert set(blocks["case_id"]) == {1, 2, 3, 4, 5}
+
+
+def test_import_template_check_duplicates(tmp_path):
+    db = str(tmp_path / "test.db")
+    first = tmp_path / "first.csv"
+    second = tmp_path / "second.csv"
+    pd.DataFrame([make_case("Alice Walker", "Bob Stone")]).to_csv(first, index=False)
+    pd.DataFrame([
+        make_case("Alise Walker", "Bob Stone", date="2025-11-25"),
+        make_case("Carol King", "Dan Reed"),
+    ]).to_csv(second, index=False)
+
+    assert import_template_into_db(str(first), db) == 1
+    count, dupes = import_template_with_duplicate_check(str(second), db)
+    assert count == 2
+    assert list(zip(dupes["case_id"], dupes["duplicate_of"])) == [(2, 1)]
+
+
+@pytest.mark.parametrize("kwargs", [
+    {"window_days": 0},
+    {"window_days": -3},
+    {"threshold": 1.5},
+    {"threshold": -0.1},
+    {"max_block_size": 0},
+])
+def test_find_duplicates_rejects_bad_arguments(tmp_path, kwargs):
+    db = str(tmp_path / "test.db")
+    init_cases_table(db)
+    with pytest.raises(ValueError):
+        find_duplicates(db, **kwargs)
+
+
+def test_shared_complainant_does_not_carry_score(tmp_path):
+    db = str(tmp_path / "test.db")
+    init_cases_table(db)
+    insert_cases_from_df(pd.DataFrame([
+        make_case("The State", "John Smith"),
+        make_case("The State", "Jane Smith", date="2025-11-25"),
+    ]), db)
+
+    assert score_pair(make_case("The State", "John Smith"), make_case("The State", "Jane Smith")) < 0.85
+    assert find_duplicates(db).empty
+
+
+def test_index_follows_deleted_and_reused_ids(tmp_path):
+    from sqlalchemy import create_engine, text
+
+    db = str(tmp_path / "test.db")
+    init_cases_table(db)
+    insert_cases_from_df(pd.DataFrame([
+        make_case("Alice Walker", "Bob Stone"),
+        make_case("Carol King", "Dan Reed"),
+    ]), db)
+    engine = create_engine(f"sqlite:///{db}")
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM cases WHERE id = 2"))
+    # SQLite reuses id 2 for the next row
+    insert_cases_from_df(pd.DataFrame([make_case("Alise Walker", "Bob Stone")]), db)
+
+    dupes = find_duplicates(db)
+    assert list(zip(dupes["case_id"], dupes["duplicate_of"])) == [(2, 1)]
+    blocks = read_table_from_sqlite("case_blocks", db)
+    assert not blocks["block_key"].str.endswith("c:K520").any()
+
+
+def test_oversized_blocks_are_skipped(tmp_path):
+    from sqlalchemy import create_engine
+
+    rng = random.Random(0)
+
+    def surname():
+        return "".join(rng.choice("bdfgklmnprst") + rng.choice("aeiou") for _ in range(3))
+
+    db = str(tmp_path / "test.db")
+    init_cases_table(db)
+    # Every case shares the complainant "The State" in one court and week
+    rows = [make_case("The State", f"{surname()} {surname()}") for _ in range(300)]
+    rows.append(make_case("The State", "Bob Stone"))
+    rows.append(make_case("The State", "Bob Stonne", date="2025-11-25"))
+    insert_cases_from_df(pd.DataFrame(rows), db)
+
+    dupes = find_duplicates(db)
+    assert list(zip(dupes["case_id"], dupes["duplicate_of"])) == [(302, 301)]
+    engine = create_engine(f"sqlite:///{db}")
+    with engine.connect() as conn:
+        assert sum(1 for _ in _candidate_pairs(conn, 20)) < 1000
+        pairs = list(_candidate_pairs(conn, 1000))
+        assert len(pairs) == len(set(pairs)) >= 300 * 299 // 2
+
+
+def assert_block_sizes_match(db):
+    from sqlalchemy import create_engine, text
+
+    engine = create_engine(f"sqlite:///{db}")
+    with engine.connect() as conn:
+        actual = set(conn.execute(text(
+            "SELECT block_key, date_bucket, COUNT(*) FROM case_blocks GROUP BY block_key, date_bucket"
+        )))
+        stored = set(conn.execute(text(
+            "SELECT block_key, date_bucket, size FROM case_block_sizes WHERE size > 0"
+        )))
+    assert stored == actual
+
+
+def test_index_follows_edited_cases(tmp_path):
+    from sqlalchemy import create_engine, text
+
+    db = str(tmp_path / "test.db")
+    init_cases_table(db)
+    insert_cases_from_df(pd.DataFrame([
+        make_case("Alice Walker", "Bob Stone"),
+        make_case("Carol King", "Dan Reed"),
+    ]), db)
+    engine = create_engine(f"sqlite:///{db}")
+    with engine.begin() as conn:
+        conn.execute(text("UPDATE cases SET complainant = 'Alise Walker' WHERE id = 2"))
+        conn.execute(text("UPDATE cases SET accused = 'Bob Stone' WHERE id = 2"))
+
+    dupes = find_duplicates(db)
+    assert list(zip(dupes["case_id"], dupes["duplicate_of"])) == [(2, 1)]
+    blocks = read_table_from_sqlite("case_blocks", db)
+    assert not blocks["block_key"].str.endswith("c:K520").any()
+    assert_block_sizes_match(db)
+
+    with engine.begin() as conn:
+        conn.execute(text("UPDATE cases SET id = 50 WHERE id = 2"))
+
+    dupes = find_duplicates(db)
+    assert list(zip(dupes["case_id"], dupes["duplicate_of"])) == [(50, 1)]
+    blocks = read_table_from_sqlite("case_blocks", db)
+    assert set(blocks["case_id"]) == {1, 50}
+    assert_block_sizes_match(db)
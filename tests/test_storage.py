@@ -26,3 +26,31 @@ def test_insert_and_read(tmp_path):
     assert len(out) == 1
     assert out.loc[0, "complainant"] == "Alice"
     assert out.loc[0, "court_heard_in"] == "Magistrates Court"
+
+
+def test_insert_survives_index_failure(tmp_path, monkeypatch):
+    import src.dedup
+
+    def fail(db_path):
+        raise RuntimeError("database is locked")
+
+    db = tmp_path / "test.db"
+    init_cases_table(str(db))
+    df = pd.DataFrame({
+        "date": ["2025-11-24"],
+        "complainant": ["Alice"],
+        "accused": ["Bob"],
+        "offences": ["Theft"],
+        "subject": ["Case A"],
+        "court_heard_in": ["Magistrates Court"],
+        "submitted": [1],
+    })
+    insert_cases_from_df(df, str(db))
+    monkeypatch.setattr(src.dedup, "update_blocking_index", fail)
+    insert_cases_from_df(df, str(db))
+    monkeypatch.undo()
+
+    out = read_table_from_sqlite("cases", str(db))
+    assert len(out) == 2
+    # The row inserted while indexing failed is picked up on the next update
+    assert src.dedup.update_blocking_index(str(db)) == 1